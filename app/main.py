@@ -1,22 +1,30 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel
+from sqlmodel import SQLModel, Session
 
 from app.database import engine
-from app.routers import post, user, auth
+from app.routers import post, user, auth, metrics, feed
 from app.models.settings_model import settings
+from app.utils.write_pipeline import post_write_pipeline
+from app.utils.compression import CompressionMiddleware
+from app.utils.post_counts import seed_post_counts
 
 
 # Create the database and tables
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed_post_counts(session)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    if settings.post_write_pipeline:
+        post_write_pipeline.start()
     yield
+    post_write_pipeline.stop()
 
 
 # Initialize the FastAPI app
@@ -40,6 +48,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Kind"],
+)
+
+
+# Add response compression middleware
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    cache_entries=settings.compression_cache_entries,
+    cache_bytes=settings.compression_cache_bytes,
+    cache_max_body_size=settings.compression_cache_max_body_size,
 )
 
 
@@ -48,6 +67,8 @@ app.add_middleware(
 app.include_router(user.router)
 app.include_router(post.router)
 app.include_router(auth.router)
+app.include_router(metrics.router)
+app.include_router(feed.router)
 
 
 # Root route for testing
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Column, Relationship
-from sqlalchemy import TIMESTAMP
+from sqlalchemy import TIMESTAMP, DDL, Index, event
 
 if TYPE_CHECKING:
     from app.models.user_model import User
@@ -23,11 +23,42 @@ class PostBase(SQLModel):
 
 class Post(PostBase, table=True):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Trigram index for title suggestions (Postgres only). GiST rather
+        # than GIN so ORDER BY title <-> :q walks the index nearest first.
+        Index(
+            "ix_posts_title_trgm",
+            "title",
+            postgresql_using="gist",
+            postgresql_ops={"title": "gist_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     id: int = Field(default=None, primary_key=True, nullable=False)
     author_id: int = Field(default=None, nullable=False, foreign_key="users.id", ondelete="CASCADE")
+    # Incremented on every update, used for optimistic concurrency (If-Match)
+    version: int = Field(default=1, nullable=False)
     author: "User" = Relationship(back_populates="posts")
 
 
+# Exact post counts maintained by the post write endpoints.
+# scope is "all" for every post, or "author:<id>" for one author's posts.
+# Each scope is spread over several slot rows that are summed on read, so
+# concurrent writers rarely wait on the same row lock.
+class PostCount(SQLModel, table=True):
+    __tablename__ = "post_counts"
+    scope: str = Field(primary_key=True)
+    slot: int = Field(default=0, primary_key=True)
+    total: int = Field(default=0, nullable=False)
+
+
+# pg_trgm must exist before the trigram index is created
+event.listen(
+    SQLModel.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
 # Simplified User reference for PostPublic
 class UserShared(SQLModel):
     id: int
@@ -43,10 +74,16 @@ class PostPublic(SQLModel):
     published: bool
     author_id: int
     author: UserShared
+    version: int
     created_at: datetime
     updated_at: datetime
 
 
+class PostSuggestion(SQLModel):
+    id: int
+    title: str
+
+
 class PostCreate(PostBase):
     pass
 
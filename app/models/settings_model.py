@@ -14,6 +14,25 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int
     postgres_url: str
     allowed_origins: str
+    # Response compression (gzip, and zstd when zstandard is installed)
+    compression_minimum_size: int = 1024
+    compression_cache_entries: int = 512
+    compression_cache_bytes: int = 16 * 1024 * 1024
+    compression_cache_max_body_size: int = 256 * 1024
+    # Public base URL for links in the Atom feed and sitemap
+    site_url: str = "http://localhost:8000"
+    feed_size: int = 50
+    sitemap_shard_size: int = 10000
+    # Reload the feed and sitemap from the database at least this often,
+    # picking up writes made by other workers or outside the app
+    feed_cache_ttl_s: float = 60.0
+    # bcrypt cost factor, calibrated per host with scripts/calibrate_bcrypt.py
+    bcrypt_rounds: int = 12
+    # Group-commit pipeline for post creation (opt-in)
+    post_write_pipeline: bool = False
+    post_write_pipeline_window_ms: float = 2.0
+    post_write_pipeline_max_rows: int = 100
+    post_write_pipeline_timeout_s: float = 5.0
 
 settings = Settings()
 
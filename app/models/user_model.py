@@ -1,8 +1,8 @@
 from datetime import datetime, timezone
 from sqlmodel import SQLModel, Field, Column, Relationship
 from sqlalchemy import TIMESTAMP
-from pydantic import BaseModel, EmailStr
-from app.models.post_model import Post
+from pydantic import BaseModel, EmailStr, field_validator
+from app.models.post_model import Post, UserShared
 
 
 class UserBase(SQLModel):
@@ -38,6 +38,12 @@ class UserPublic(SQLModel):
     posts: list[PostShared] = []
 
 
+# Batch lookup result: found users in request order, plus ids that do not exist
+class UserBatch(SQLModel):
+    users: list[UserShared]
+    missing: list[int] = []
+
+
 class UserCreate(SQLModel):
     email: EmailStr
     username: str
@@ -50,6 +56,14 @@ class UserUpdate(SQLModel):
     password: str | None = None
     disabled: bool | None = False
 
+    # Omit a field to leave it unchanged; none of them can be set to null
+    @field_validator("username", "email", "password", "disabled")
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
 
 class UserLogin(SQLModel):
     email: EmailStr
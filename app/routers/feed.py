@@ -0,0 +1,42 @@
+from fastapi import HTTPException, status, APIRouter, Request, Response
+
+from app.utils.feeds import Document, feed_cache
+
+router = APIRouter(
+    prefix="/v2",
+    tags=["Feeds"],
+)
+
+
+# Serve a precomputed document, or 304 when the client already has it
+def document_response(request: Request, document: Document, media_type: str) -> Response:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or document.etag in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": document.etag})
+    return Response(content=document.body, media_type=media_type, headers={"ETag": document.etag})
+
+
+# Atom feed of the latest published posts
+@router.get("/feed.atom")
+def get_feed(request: Request):
+    return document_response(request, feed_cache.feed(), "application/atom+xml")
+
+
+# Sitemap index pointing at the shards
+@router.get("/sitemap.xml")
+def get_sitemap_index(request: Request):
+    return document_response(request, feed_cache.sitemap_index(), "application/xml")
+
+
+# A single sitemap shard
+@router.get("/sitemaps/{shard}.xml")
+def get_sitemap_shard(shard: int, request: Request):
+    document = feed_cache.sitemap_shard(shard)
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sitemap shard {shard} not found",
+        )
+    return document_response(request, document, "application/xml")
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from app.utils.single_flight import read_coalescer
+
+router = APIRouter(
+    prefix="/v2/metrics",
+    tags=["Metrics"],
+)
+
+
+# Read coalescing: executed vs collapsed requests per endpoint group
+@router.get("/coalescing")
+def get_coalescing_metrics() -> dict[str, dict[str, int]]:
+    return read_coalescer.stats()
@@ -1,11 +1,20 @@
+import re
+from concurrent.futures import Future
 from typing import Annotated, List
 from datetime import datetime, timezone
-from fastapi import HTTPException, status, APIRouter, Depends
-from sqlmodel import select
+from fastapi import HTTPException, status, APIRouter, Depends, Header, Query, Response
+from sqlmodel import select, update, delete
 
 from app.models import post_model, user_model
-from app.database import SessionDep
+from app.database import SessionDep, engine
 from app.utils.security import get_current_active_user
+from app.utils.write_pipeline import post_write_pipeline
+from app.utils.title_index import title_index
+from app.utils.single_flight import read_coalescer
+from app.utils import read_queries
+from app.utils.feeds import feed_cache
+from app.utils import post_counts
+from app.models.settings_model import settings
 
 
 router = APIRouter(
@@ -13,36 +22,117 @@ router = APIRouter(
     tags=["Posts"],
 )
 
+# Largest value the INTEGER version column holds
+MAX_VERSION = 2**31 - 1
+
+
+# ETag for a post version
+def post_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+# Parse an If-Match header into the post versions it accepts.
+# Returns None for a missing header or "*", which match any version.
+# Weak or malformed entries can never match our strong ETags and are skipped,
+# so a header without a usable entry gives an empty set that matches nothing.
+def parse_if_match(if_match: str | None) -> set[int] | None:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        value = tag[1:-1]
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and value.isascii() and value.isdigit():
+            # Larger numbers cannot be a version (INTEGER column)
+            if int(value) <= MAX_VERSION:
+                versions.add(int(value))
+    return versions
+
 
 # Get all posts
 @router.get("/", response_model=List[post_model.PostPublic])
-def get_posts(session: SessionDep, limit: int = 10, skip: int = 0, search: str | None = None):
-    query = select(post_model.Post).offset(skip).limit(limit)
-    if search:
-        query = query.where(post_model.Post.title.ilike(f"%{search}%"))
-    posts = session.exec(query).all()
-    return posts
+def get_posts(
+    session: SessionDep,
+    response: Response,
+    limit: int = 10,
+    skip: int = 0,
+    search: str | None = None,
+    author_id: int | None = None,
+):
+    # Exact from counters when unfiltered or per author, estimated for searches
+    total, exact = post_counts.count_posts(session, author_id=author_id, search=search)
+    response.headers["X-Total-Count"] = str(total)
+    response.headers["X-Total-Count-Kind"] = "exact" if exact else "estimated"
+
+    # Posts and authors in one statement, mapped straight to PostPublic
+    return read_queries.list_posts(
+        session, limit=limit, skip=skip, author_id=author_id, search=search
+    )
 
 
 # Get latest post - must come before /{id} route
 @router.get("/latest", response_model=post_model.PostPublic)
 def get_latest_post(session: SessionDep):
-    query = select(post_model.Post).order_by(post_model.Post.created_at.desc()).limit(1)
-    post = session.exec(query).first()
-    return post
+    # Concurrent requests share one query and one serialized body
+    def load_latest_post():
+        post = read_queries.get_latest_post(session)
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No posts found",
+            )
+        return post.model_dump_json()
+
+    body = read_coalescer.do(("post_latest",), load_latest_post)
+    return Response(content=body, media_type="application/json")
+
+
+# Suggest post titles as the user types - must come before /{id} route
+@router.get("/suggest", response_model=List[post_model.PostSuggestion])
+def suggest_post_titles(
+    session: SessionDep,
+    q: Annotated[str, Query(min_length=1, max_length=64)],
+    limit: Annotated[int, Query(ge=1, le=20)] = 10,
+):
+    # Both backends match q where it starts a word of the title
+    if engine.dialect.name == "postgresql":
+        # title ~* '\m<q>', nearest first straight from the GiST trigram index
+        title = post_model.Post.title
+        pattern = "\\m" + re.sub(r"(\W)", r"\\\1", q)
+        query = (
+            select(post_model.Post.id, title)
+            .where(title.regexp_match(pattern, flags="i"))
+            .order_by(title.op("<->")(q))
+            .limit(limit)
+        )
+        return [
+            post_model.PostSuggestion(id=id, title=title)
+            for id, title in session.exec(query).all()
+        ]
+
+    # Elsewhere: the in-memory word index
+    return title_index.suggest(q, limit)
 
 
 # Get a single post
 @router.get("/{id}", response_model=post_model.PostPublic)
 def get_post_by_id(id: int, session: SessionDep):
-    query = select(post_model.Post).where(post_model.Post.id == id)
-    post = session.exec(query).first()
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Post with id {id} not found",
-        )
-    return post
+    # Concurrent requests for the same post share one query and one serialized body
+    def load_post():
+        post = read_queries.get_post(session, id)
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Post with id {id} not found",
+            )
+        return post.version, post.model_dump_json()
+
+    version, body = read_coalescer.do(("post", id), load_post)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": post_etag(version)},
+    )
 
 
 # Create a post
@@ -52,23 +142,74 @@ def create_post(
     session: SessionDep,
     current_user: Annotated[user_model.User, Depends(get_current_active_user)],
 ):
-    user = session.get(user_model.User, current_user.id)
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
     # Set the author_id to the current user's ID
     db_post = post_model.Post.model_validate(post_data)
-    db_post.author_id = user.id
-    
+    db_post.author_id = current_user.id
+
+    # Opt-in group commit: wait for the batch containing this post.
+    # Release this request's connection first so waiting requests
+    # cannot starve the pipeline of pool connections.
+    if settings.post_write_pipeline:
+        session.close()
+        future = post_write_pipeline.submit(db_post)
+        future.add_done_callback(post_inserted)
+        try:
+            return future.result(timeout=settings.post_write_pipeline_timeout_s)
+        except TimeoutError:
+            # Withdraw the post if it is still queued. Once its batch is
+            # running it may still be committed (and indexed by the
+            # callback), so a client that retries can create a duplicate.
+            future.cancel()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Post was not confirmed in time and may still be saved",
+                headers={"Retry-After": "1"},
+            )
+
+    # Flush issues INSERT ... RETURNING id, so the row is complete without a refresh
     session.add(db_post)
+    session.flush()
+    post_counts.adjust_post_counts(session, {db_post.author_id: 1})
+
+    # Serialize before commit expires the instances (author comes from the identity map)
+    post_public = post_model.PostPublic.model_validate(db_post)
     session.commit()
-    session.refresh(db_post)
-    return db_post
+    post_saved(post_public)
+    return post_public
+
+
+# Keep the in-memory title index and feed current once a new post is committed
+def post_saved(post_public: post_model.PostPublic):
+    title_index.add(post_public.id, post_public.title, post_public.version)
+    feed_cache.post_saved(post_public)
+
+
+# Done-callback for pipelined inserts. Runs on the pipeline thread whenever
+# the insert commits, including after the waiting request has timed out.
+def post_inserted(future: Future):
+    if not future.cancelled() and future.exception() is None:
+        post_saved(future.result())
+
+
+# Tell a missing post apart from a post owned by someone else or a stale version.
+# Only called when a conditional write matched no rows.
+def raise_post_write_miss(session: SessionDep, id: int, user_id: int):
+    query = select(post_model.Post.author_id).where(post_model.Post.id == id)
+    author_id = session.exec(query).first()
+    if author_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with id {id} not found",
+        )
+    if author_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"User {user_id} is not the author of this post",
+        )
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="If-Match does not match the current post version",
+    )
 
 
 # Delete a post
@@ -78,29 +219,25 @@ def delete_post(
     session: SessionDep,
     current_user: Annotated[user_model.User, Depends(get_current_active_user)],
 ):
-    user = session.get(user_model.User, current_user.id)
-    post = session.get(post_model.Post, id)
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-            headers={"WWW-Authenticate": "Bearer"},
+    # DELETE ... WHERE id = :id AND author_id = :uid RETURNING *
+    query = (
+        delete(post_model.Post)
+        .where(
+            (post_model.Post.id == id)
+            & (post_model.Post.author_id == current_user.id)
         )
+        .returning(post_model.Post)
+    )
+    post = session.exec(query).scalar_one_or_none()
     if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Post with id {id} not found",
-        )
-    if post.author_id != user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"User {user.id} is not the author of this post",
-        )
-    
-    session.delete(post)
+        raise_post_write_miss(session, id, current_user.id)
+    post_counts.adjust_post_counts(session, {post.author_id: -1})
+
+    post_public = post_model.PostPublic.model_validate(post)
     session.commit()
-    return post
+    title_index.remove(id)
+    feed_cache.post_deleted(id)
+    return post_public
 
 
 # Update a post
@@ -108,35 +245,34 @@ def delete_post(
 def update_post(
     id: int, post_update: post_model.PostUpdate, session: SessionDep,
     current_user: Annotated[user_model.User, Depends(get_current_active_user)],
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    user = session.get(user_model.User, current_user.id)
-    post = session.get(post_model.Post, id)
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Post with id {id} not found",
-        )
-    if post.author_id != user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"User {user.id} is not the author of this post",
-        )
+    expected_versions = parse_if_match(if_match)
 
     # Convert to dict excluding unset values
     update_data = post_update.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
+    update_data["version"] = post_model.Post.version + 1
+
+    # UPDATE ... WHERE id = :id AND author_id = :uid [AND version IN (:v, ...)] RETURNING *
+    condition = (post_model.Post.id == id) & (post_model.Post.author_id == current_user.id)
+    if expected_versions is not None:
+        condition &= post_model.Post.version.in_(expected_versions)
+    query = (
+        update(post_model.Post)
+        .where(condition)
+        .values(**update_data)
+        .returning(post_model.Post)
+    )
+    post = session.exec(query).scalar_one_or_none()
+    if not post:
+        raise_post_write_miss(session, id, current_user.id)
 
-    # Only update fields that were provided
-    for key, value in update_data.items():
-        setattr(post, key, value)
-    post.updated_at = datetime.now(timezone.utc)
-    session.add(post)
+    response.headers["ETag"] = post_etag(post.version)
+    post_public = post_model.PostPublic.model_validate(post)
     session.commit()
-    session.refresh(post)
-    return post
+    if "title" in update_data:
+        title_index.add(post_public.id, post_public.title, post_public.version)
+    feed_cache.post_saved(post_public)
+    return post_public
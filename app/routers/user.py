@@ -1,7 +1,9 @@
 from typing import Annotated
 
-from fastapi import HTTPException, status, APIRouter, Depends
-from sqlmodel import select
+from fastapi import HTTPException, status, APIRouter, Depends, Query, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select, update
 
 from app.models import user_model
 from app.models.post_model import Post
@@ -11,12 +13,21 @@ from app.utils.security import (
     hash_password,
     get_current_active_user,
 )
+from app.utils.title_index import title_index
+from app.utils.single_flight import read_coalescer
+from app.utils import read_queries
+from app.utils.feeds import feed_cache
+from app.utils import post_counts
 
 router = APIRouter(
     prefix="/v2/users",
     tags=["Users"],
 )
 
+MAX_BATCH_USER_IDS = 100
+# Largest id an INTEGER primary key can hold (Postgres int4)
+MAX_USER_ID = 2**31 - 1
+
 
 # Create a user
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -38,25 +49,90 @@ def create_user(
     return db_user
 
 
+# Load a user's posts in one query and attach them, so serializing
+# UserPublic does not go back to the database for them
+def load_user_posts(session: SessionDep, user: user_model.User) -> list[Post]:
+    query = select(Post).where(Post.author_id == user.id)
+    posts = session.exec(query).all()
+    set_committed_value(user, "posts", posts)
+    return posts
+
+
+# Get several users by id in one query, e.g. /v2/users/?ids=1,2,3
+@router.get("/")
+def get_users_by_ids(
+    ids: Annotated[str, Query(pattern=r"^\d+(,\d+)*$", max_length=2000)],
+    session: SessionDep,
+) -> user_model.UserBatch:
+    # Deduplicate while keeping the requested order
+    requested = list(dict.fromkeys(int(id) for id in ids.split(",")))
+    if len(requested) > MAX_BATCH_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_USER_IDS} ids per request",
+        )
+    # Out-of-range ids would fail in the driver instead of simply not matching
+    if any(id > MAX_USER_ID for id in requested):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"User ids must be at most {MAX_USER_ID}",
+        )
+
+    found = read_queries.get_users_shared(session, requested)
+    return user_model.UserBatch(
+        users=[found[id] for id in requested if id in found],
+        missing=[id for id in requested if id not in found],
+    )
+
+
 # Get current user
 @router.get("/me")
 def get_my_profile(
+    session: SessionDep,
     current_user: Annotated[user_model.User, Depends(get_current_active_user)],
 ) -> user_model.UserPublic:
+    load_user_posts(session, current_user)
     return current_user
 
 
 # Get a single user
-@router.get("/{id}")
-def get_user_by_id(id: int, session: SessionDep) -> user_model.UserPublic:
-    query = select(user_model.User).where(user_model.User.id == id)
-    user = session.exec(query).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with id {id} not found",
-        )
-    return user
+@router.get("/{id}", response_model=user_model.UserPublic)
+def get_user_by_id(id: int, session: SessionDep):
+    # Concurrent requests for the same user share one query and one serialized body
+    def load_user():
+        query = select(user_model.User).where(user_model.User.id == id)
+        user = session.exec(query).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with id {id} not found",
+            )
+        load_user_posts(session, user)
+        return user_model.UserPublic.model_validate(user).model_dump_json()
+
+    body = read_coalescer.do(("user", id), load_user)
+    return Response(content=body, media_type="application/json")
+
+
+# Tell which unique field an update collided with.
+# Only called after the UPDATE itself failed on an integrity constraint;
+# returns without raising when no other user holds the email or username.
+def raise_user_conflict(session: SessionDep, user_id: int, update_data: dict):
+    email = update_data.get("email")
+    username = update_data.get("username")
+    query = select(user_model.User.email, user_model.User.username).where(
+        ((user_model.User.email == email) | (user_model.User.username == username))
+        & (user_model.User.id != user_id)
+    )
+    existing = session.exec(query).first()
+    if existing is None:
+        return
+    error = (
+        "User with this email already exists"
+        if email is not None and existing.email == email
+        else "User with this username already exists"
+    )
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
 
 
 # Update my profile
@@ -66,57 +142,46 @@ def update_my_profile(
     session: SessionDep,
     current_user: Annotated[user_model.User, Depends(get_current_active_user)],
 ) -> user_model.UserPublic:
-    user = session.get(user_model.User, current_user.id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"User with id {current_user.id} not found",
-        )
-
-    # Check if the authenticated user is updating their own profile
-    if user.id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this user",
-        )
-
     # Convert to dict excluding unset values
     update_data = user_update.model_dump(exclude_unset=True)
+    if not update_data:
+        load_user_posts(session, current_user)
+        return current_user
 
     # Hash password if it's being updated
     if "password" in update_data:
         update_data["password"] = hash_password(update_data["password"])
 
-    # Check if the user is updating their own email
-    if "email" in update_data:
-        # Check if the email is already taken
-        email_exists, error = check_user_exists(update_data["email"], session)
-        if email_exists:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
-            
-    # Check if the user is updating their username
-    if "username" in update_data:
-        # Check if the username is already taken by another user
-        query = select(user_model.User).where(
-            (user_model.User.username == update_data["username"]) & 
-            (user_model.User.id != user.id)
+    # UPDATE ... WHERE id = :uid RETURNING *, letting the unique
+    # constraints on email and username reject duplicates
+    query = (
+        update(user_model.User)
+        .where(user_model.User.id == current_user.id)
+        .values(**update_data)
+        .returning(user_model.User)
+    )
+    try:
+        user = session.exec(query).scalar_one_or_none()
+    except IntegrityError:
+        session.rollback()
+        raise_user_conflict(session, current_user.id, update_data)
+        raise
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {current_user.id} not found",
         )
-        existing_user = session.exec(query).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, 
-                detail="User with this username already exists"
-            )
 
-    # Only update fields that were provided
-    for key, value in update_data.items():
-        setattr(user, key, value)
-
-    session.add(user)
+    # Serialize before commit expires the instance
+    load_user_posts(session, user)
+    response = user_model.UserPublic.model_validate(user)
     session.commit()
-    session.refresh(user)
 
-    return user
+    # Feed entries carry the author's username
+    if "username" in update_data:
+        feed_cache.invalidate_feed()
+
+    return response
 
 
 # Delete my profile
@@ -132,14 +197,21 @@ def delete_my_profile(
             detail=f"User with id {current_user.id} not found",
         )
 
+    # Serialize before deleting; the response still lists the posts
+    posts = load_user_posts(session, user)
+    response = user_model.UserPublic.model_validate(user)
+
     # First delete all posts by this user to maintain referential integrity
-    query = select(Post).where(Post.author_id == user.id)
-    posts = session.exec(query).all()
     for post in posts:
         session.delete(post)
-    
+
+    post_counts.adjust_post_counts(session, {user.id: -len(posts)})
+
     # Then delete the user
     session.delete(user)
     session.commit()
+    for post in posts:
+        title_index.remove(post.id)
+        feed_cache.post_deleted(post.id)
 
-    return user
+    return response
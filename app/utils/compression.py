@@ -0,0 +1,236 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+
+# Media types worth compressing; everything else passes through untouched
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/xml",
+    "application/atom+xml",
+    "application/rss+xml",
+    "text/html",
+    "text/plain",
+    "text/xml",
+    "text/css",
+    "text/javascript",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick zstd or gzip from an Accept-Encoding header, honouring q-values"""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.strip()] = q
+
+    wildcard = offered.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ("zstd", "gzip") if zstandard else ("gzip",):
+        q = offered.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class Compressor:
+    """One-shot and streaming compression for a single encoding"""
+
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        self.encoding = encoding
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self._stream = None
+
+    def compress(self, body: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+        stream = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return stream.compress(body) + stream.flush()
+
+    def compress_chunk(self, chunk: bytes, final: bool) -> bytes:
+        # Flush after every chunk so streamed data reaches the client promptly
+        if self._stream is None:
+            if self.encoding == "zstd":
+                self._stream = zstandard.ZstdCompressor(level=self.zstd_level).compressobj()
+            else:
+                self._stream = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        data = self._stream.compress(chunk)
+        if final:
+            return data + self._stream.flush()
+        if self.encoding == "zstd":
+            return data + self._stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return data + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+
+class CompressedVariantCache:
+    """LRU of compressed bodies keyed by body digest and encoding.
+
+    Responses served repeatedly with the same bytes (coalesced hot reads,
+    feeds) are compressed once; later hits only pay for hashing the body.
+    The cache is bounded both by entry count and by the total size of the
+    compressed bodies it holds. Bodies larger than max_body_size (e.g. a
+    list page with a huge limit) are compressed without being cached.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, max_body_size: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_body_size = max_body_size
+        self._entries: OrderedDict[tuple[bytes, str], bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compress(self, body: bytes, compressor: Compressor) -> bytes:
+        if self.max_entries <= 0 or len(body) > self.max_body_size:
+            return compressor.compress(body)
+        key = (hashlib.blake2b(body, digest_size=16).digest(), compressor.encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                return compressed
+        compressed = compressor.compress(body)
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/zstd response compression.
+
+    Only responses with an allowlisted content type and at least
+    minimum_size bytes are compressed. Single-message bodies go through
+    the variant cache; streaming bodies are compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+        cache_entries: int = 512,
+        cache_bytes: int = 16 * 1024 * 1024,
+        cache_max_body_size: int = 256 * 1024,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.cache = CompressedVariantCache(cache_entries, cache_bytes, cache_max_body_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compressor = Compressor(encoding, self.gzip_level, self.zstd_level)
+        responder = CompressionResponder(self.app, compressor, self.minimum_size, self.cache)
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(
+        self,
+        app: ASGIApp,
+        compressor: Compressor,
+        minimum_size: int,
+        cache: CompressedVariantCache,
+    ) -> None:
+        self.app = app
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.cache = cache
+        self.send: Send | None = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressing = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk decides the encoding
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or content_type not in COMPRESSIBLE_CONTENT_TYPES
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.started:
+            # Remaining chunks of a streaming response
+            if self.compressing:
+                message["body"] = self.compressor.compress_chunk(body, final=not more_body)
+            await self.send(message)
+            return
+
+        self.started = True
+        if self.passthrough or (not more_body and len(body) < self.minimum_size):
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        headers["Content-Encoding"] = self.compressor.encoding
+        if more_body:
+            self.compressing = True
+            del headers["Content-Length"]
+            message["body"] = self.compressor.compress_chunk(body, final=False)
+        else:
+            message["body"] = self.cache.get_or_compress(body, self.compressor)
+            headers["Content-Length"] = str(len(message["body"]))
+
+        await self.send(self.initial_message)
+        await self.send(message)
@@ -0,0 +1,302 @@
+import hashlib
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from sqlmodel import Session
+
+from app.database import engine
+from app.models.post_model import PostPublic
+from app.models.settings_model import settings
+from app.utils import read_queries
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+class Document(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_document(root: ET.Element) -> Document:
+    body = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+    return Document(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def newest_first(entries) -> list[PostPublic]:
+    return sorted(entries, key=lambda e: as_utc(e.created_at), reverse=True)
+
+
+def post_url(id: int) -> str:
+    return f"{settings.site_url}/v2/posts/{id}"
+
+
+class FeedCache:
+    """Precomputed Atom feed and sharded sitemap for published posts.
+
+    Both are loaded from the database on first use and then kept current
+    by the post write endpoints. The feed keeps the newest feed_size posts;
+    the sitemap keeps (id, lastmod) for every published post, sharded by id
+    range so an edit only re-renders one shard. Rendered documents are
+    cached with a content-hash ETag until something they contain changes.
+
+    Write hooks carry the post version, and a hook older than the version
+    already seen is ignored, so concurrent updates finishing out of order
+    cannot leave stale entries behind. The cache only sees writes made
+    through this process; it is reloaded from the database every ttl
+    seconds to pick up the rest (other workers, scripts, direct SQL).
+
+    Reloads query the database without holding the lock the write hooks
+    take. Hooks that run meanwhile are applied at once and also journaled,
+    then replayed over the freshly loaded rows, where the version guard
+    drops any the rows already include.
+    """
+
+    def __init__(self, feed_size: int, shard_size: int, ttl: float):
+        self.feed_size = feed_size
+        self.shard_size = shard_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Held for the whole of a reload, so only one query runs at a time
+        self._load_lock = threading.Lock()
+        # Changes made by write hooks during a reload, None when none is running
+        self._journal: list | None = None
+        # Latest version seen per post id, from loads and write hooks
+        self._versions: dict[int, int] = {}
+        # Feed window: newest published posts, None until (re)loaded
+        self._entries: dict[int, PostPublic] | None = None
+        self._feed: Document | None = None
+        self._feed_loaded_at = 0.0
+        # Sitemap: lastmod per published post id, None until loaded
+        self._lastmods: dict[int, datetime] | None = None
+        self._shards: dict[int, Document] = {}
+        self._index: Document | None = None
+        self._sitemap_loaded_at = 0.0
+
+    def _expired(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at >= self.ttl
+
+    def _seen(self, id: int, version: int):
+        self._versions[id] = max(self._versions.get(id, 0), version)
+
+    def _shard_of(self, id: int) -> int:
+        return id // self.shard_size
+
+    def _touch_sitemap(self, id: int):
+        self._shards.pop(self._shard_of(id), None)
+        self._index = None
+
+    # Changes, applied with the lock held
+
+    def _saved(self, post: PostPublic):
+        if post.version < self._versions.get(post.id, 0):
+            # An older write whose hook ran after a newer one
+            return
+        self._versions[post.id] = post.version
+
+        if self._lastmods is not None:
+            if post.published:
+                self._lastmods[post.id] = as_utc(post.updated_at)
+                self._touch_sitemap(post.id)
+            elif self._lastmods.pop(post.id, None) is not None:
+                self._touch_sitemap(post.id)
+
+        if self._entries is not None:
+            if not post.published:
+                if post.id in self._entries:
+                    # The window lost an entry; refill it from the database
+                    self._entries = None
+                return
+            in_window = (
+                post.id in self._entries
+                or len(self._entries) < self.feed_size
+                or as_utc(post.created_at) > min(as_utc(e.created_at) for e in self._entries.values())
+            )
+            if in_window:
+                self._entries[post.id] = post
+                newest = newest_first(self._entries.values())
+                self._entries = {e.id: e for e in newest[: self.feed_size]}
+                self._feed = None
+
+    def _deleted(self, id: int):
+        self._versions.pop(id, None)
+        if self._lastmods is not None and self._lastmods.pop(id, None) is not None:
+            self._touch_sitemap(id)
+        if self._entries is not None and id in self._entries:
+            self._entries = None
+
+    def _invalidated(self):
+        self._entries = None
+
+    def _apply(self, change, *args):
+        with self._lock:
+            change(*args)
+            if self._journal is not None:
+                self._journal.append((change, args))
+
+    # Write hooks, called after the transaction commits
+
+    def post_saved(self, post: PostPublic):
+        self._apply(self._saved, post)
+
+    def post_deleted(self, id: int):
+        self._apply(self._deleted, id)
+
+    def invalidate_feed(self):
+        # Author details in the feed changed (e.g. a username)
+        self._apply(self._invalidated)
+
+    def clear(self):
+        # Forget everything; the next request reloads from the database
+        with self._lock:
+            self._versions = {}
+            self._entries = None
+            self._feed = None
+            self._lastmods = None
+            self._shards = {}
+            self._index = None
+
+    # Loading
+
+    def _reload(self, fresh, query, swap):
+        """Run query and swap in its result, unless fresh() says there is no need"""
+        with self._lock:
+            if fresh():
+                return
+        with self._load_lock:
+            with self._lock:
+                # Another request may have reloaded while this one waited
+                if fresh():
+                    return
+                self._journal = []
+            try:
+                with Session(engine) as session:
+                    rows = query(session)
+                with self._lock:
+                    swap(rows)
+                    for change, args in self._journal:
+                        change(*args)
+            finally:
+                with self._lock:
+                    self._journal = None
+
+    def _feed_fresh(self) -> bool:
+        return self._entries is not None and not self._expired(self._feed_loaded_at)
+
+    def _query_feed(self, session: Session) -> list[PostPublic]:
+        return read_queries.list_latest_published_posts(session, self.feed_size)
+
+    def _swap_feed(self, posts: list[PostPublic]):
+        for post in posts:
+            self._seen(post.id, post.version)
+        self._entries = {post.id: post for post in posts}
+        self._feed = None
+        self._feed_loaded_at = time.monotonic()
+
+    def _sitemap_fresh(self) -> bool:
+        return self._lastmods is not None and not self._expired(self._sitemap_loaded_at)
+
+    def _query_sitemap(self, session: Session) -> dict[int, tuple[int, datetime]]:
+        return read_queries.list_published_post_lastmods(session)
+
+    def _swap_sitemap(self, lastmods: dict[int, tuple[int, datetime]]):
+        for id, (version, _) in lastmods.items():
+            self._seen(id, version)
+        self._lastmods = {id: as_utc(lastmod) for id, (_, lastmod) in lastmods.items()}
+        self._shards = {}
+        self._index = None
+        self._sitemap_loaded_at = time.monotonic()
+
+    # Documents. A hook replayed after a reload can drop the loaded state
+    # again (e.g. a post leaving the feed window), hence the loops.
+
+    def feed(self) -> Document:
+        while True:
+            self._reload(self._feed_fresh, self._query_feed, self._swap_feed)
+            with self._lock:
+                if self._entries is not None:
+                    if self._feed is None:
+                        self._feed = self._render_feed()
+                    return self._feed
+
+    def sitemap_index(self) -> Document:
+        while True:
+            self._reload(self._sitemap_fresh, self._query_sitemap, self._swap_sitemap)
+            with self._lock:
+                if self._lastmods is not None:
+                    if self._index is None:
+                        self._index = self._render_index()
+                    return self._index
+
+    def sitemap_shard(self, shard: int) -> Document | None:
+        while True:
+            self._reload(self._sitemap_fresh, self._query_sitemap, self._swap_sitemap)
+            with self._lock:
+                if self._lastmods is not None:
+                    if shard not in self._shards:
+                        lastmods = {
+                            id: lastmod for id, lastmod in self._lastmods.items()
+                            if self._shard_of(id) == shard
+                        }
+                        if not lastmods:
+                            return None
+                        self._shards[shard] = self._render_shard(lastmods)
+                    return self._shards[shard]
+
+    def _render_feed(self) -> Document:
+        entries = newest_first(self._entries.values())
+        feed = ET.Element("feed", xmlns=ATOM_NS)
+        ET.SubElement(feed, "title").text = settings.title
+        ET.SubElement(feed, "id").text = f"{settings.site_url}/v2/feed.atom"
+        ET.SubElement(feed, "link", rel="self", href=f"{settings.site_url}/v2/feed.atom")
+        updated = max((as_utc(e.updated_at) for e in entries), default=datetime.now(timezone.utc))
+        ET.SubElement(feed, "updated").text = updated.isoformat()
+        for post in entries:
+            entry = ET.SubElement(feed, "entry")
+            ET.SubElement(entry, "title").text = post.title
+            ET.SubElement(entry, "id").text = post_url(post.id)
+            ET.SubElement(entry, "link", href=post_url(post.id))
+            ET.SubElement(entry, "published").text = as_utc(post.created_at).isoformat()
+            ET.SubElement(entry, "updated").text = as_utc(post.updated_at).isoformat()
+            author = ET.SubElement(entry, "author")
+            ET.SubElement(author, "name").text = post.author.username
+            ET.SubElement(entry, "content", type="text").text = post.content
+        return make_document(feed)
+
+    def _render_index(self) -> Document:
+        shards: dict[int, datetime] = {}
+        for id, lastmod in self._lastmods.items():
+            shard = self._shard_of(id)
+            if shard not in shards or lastmod > shards[shard]:
+                shards[shard] = lastmod
+        index = ET.Element("sitemapindex", xmlns=SITEMAP_NS)
+        for shard in sorted(shards):
+            sitemap = ET.SubElement(index, "sitemap")
+            ET.SubElement(sitemap, "loc").text = f"{settings.site_url}/v2/sitemaps/{shard}.xml"
+            ET.SubElement(sitemap, "lastmod").text = shards[shard].isoformat()
+        return make_document(index)
+
+    def _render_shard(self, lastmods: dict[int, datetime]) -> Document:
+        urlset = ET.Element("urlset", xmlns=SITEMAP_NS)
+        for id in sorted(lastmods):
+            url = ET.SubElement(urlset, "url")
+            ET.SubElement(url, "loc").text = post_url(id)
+            ET.SubElement(url, "lastmod").text = lastmods[id].isoformat()
+        return make_document(urlset)
+
+
+feed_cache = FeedCache(
+    feed_size=settings.feed_size,
+    shard_size=settings.sitemap_shard_size,
+    ttl=settings.feed_cache_ttl_s,
+)
@@ -0,0 +1,138 @@
+import json
+import random
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session
+
+from app.database import engine
+from app.models.post_model import Post, PostCount
+from app.utils.read_queries import post_filters
+
+# Rows read per sampled estimate on SQLite; smaller tables are counted exactly
+SAMPLE_ROWS = 1000
+# Counter rows per scope; each write transaction updates one at random
+COUNTER_SLOTS = 16
+
+posts = Post.__table__
+
+
+def scope_for(author_id: int | None) -> str:
+    return "all" if author_id is None else f"author:{author_id}"
+
+
+def insert_counts(rows: list[dict]):
+    insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    return insert(PostCount).values(rows)
+
+
+def counters_initialized(session: Session) -> bool:
+    query = select(PostCount.scope).where(PostCount.scope == "all").limit(1)
+    return session.exec(query).first() is not None
+
+
+def seed_post_counts(session: Session):
+    """Compute the counters from the posts table if they were never initialized.
+
+    Workers starting together may all get here; the first insert wins and
+    the others are no-ops.
+    """
+    if counters_initialized(session):
+        return
+    per_author = session.connection().execute(
+        select(posts.c.author_id, func.count()).group_by(posts.c.author_id)
+    ).all()
+    totals = {scope_for(author_id): total for author_id, total in per_author}
+    totals["all"] = sum(totals.values())
+    rows = [{"scope": scope, "slot": 0, "total": total} for scope, total in totals.items()]
+    session.exec(insert_counts(rows).on_conflict_do_nothing())
+    session.commit()
+
+
+def adjust_post_counts(session: Session, deltas: dict[int, int]):
+    """Apply per-author post count changes inside the caller's transaction.
+
+    Must run in the same transaction as the post writes it accounts for.
+    All changes go to one randomly chosen slot, and rows are upserted in
+    scope order so concurrent writers lock them in a consistent order.
+    """
+    changes = {"all": sum(deltas.values())}
+    changes.update({scope_for(author_id): delta for author_id, delta in deltas.items()})
+    slot = random.randrange(COUNTER_SLOTS)
+    rows = [
+        {"scope": scope, "slot": slot, "total": delta}
+        for scope, delta in sorted(changes.items())
+        if delta
+    ]
+    if not rows:
+        return
+
+    statement = insert_counts(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[PostCount.scope, PostCount.slot],
+        set_={"total": PostCount.total + statement.excluded.total},
+    )
+    session.exec(statement)
+
+
+def count_posts(
+    session: Session, author_id: int | None = None, search: str | None = None
+) -> tuple[int, bool]:
+    """Total posts matching a listing, and whether the number is exact.
+
+    Unfiltered and per-author totals come from the counters. Searches are
+    estimated: from planner statistics on Postgres, from a sample of rows
+    elsewhere.
+    """
+    total = session.exec(
+        select(func.sum(PostCount.total)).where(PostCount.scope == scope_for(author_id))
+    ).scalar() or 0
+    if not search or total == 0:
+        return total, True
+
+    if engine.dialect.name == "postgresql":
+        return min(estimate_from_planner(session, author_id, search), total), False
+    return estimate_from_sample(session, author_id, search, total)
+
+
+def estimate_from_planner(session: Session, author_id: int | None, search: str) -> int:
+    query = select(posts.c.id).where(*post_filters(author_id, search))
+    compiled = query.compile(dialect=engine.dialect)
+    plan = session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_from_sample(
+    session: Session, author_id: int | None, search: str, total: int
+) -> tuple[int, bool]:
+    # Small enough to count outright
+    if total <= SAMPLE_ROWS:
+        exact = session.connection().execute(
+            select(func.count()).select_from(posts).where(*post_filters(author_id, search))
+        ).scalar()
+        return exact, True
+
+    # Read a block of rows from a random point in the id range and scale
+    # the fraction that matches the search up to the exact total
+    low, high = session.connection().execute(
+        select(func.min(posts.c.id), func.max(posts.c.id))
+    ).one()
+    start = random.randint(low, max(low, high - SAMPLE_ROWS))
+    [match] = post_filters(search=search)
+    sample = (
+        select(case((match, 1), else_=0).label("hit"))
+        .where(*post_filters(author_id), posts.c.id >= start)
+        .order_by(posts.c.id)
+        .limit(SAMPLE_ROWS)
+        .subquery()
+    )
+    sampled, hits = session.connection().execute(
+        select(func.count(), func.coalesce(func.sum(sample.c.hit), 0))
+    ).one()
+    if sampled == 0:
+        return total, False
+    return round(total * hits / sampled), False
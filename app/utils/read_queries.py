@@ -0,0 +1,114 @@
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlmodel import Session
+
+from app.models.post_model import Post, PostPublic, UserShared
+from app.models.user_model import User
+
+# Read-only queries that bypass the ORM: they select exactly the columns a
+# response model needs, join the author in the same statement, and build the
+# response objects straight from rows, with no identity map or change tracking.
+
+posts = Post.__table__
+users = User.__table__
+
+
+def select_post_public():
+    return select(
+        posts.c.id,
+        posts.c.title,
+        posts.c.content,
+        posts.c.published,
+        posts.c.author_id,
+        posts.c.version,
+        posts.c.created_at,
+        posts.c.updated_at,
+        users.c.username,
+        users.c.email,
+        users.c.created_at.label("author_created_at"),
+    ).join(users, users.c.id == posts.c.author_id)
+
+
+def row_to_post_public(row: Row) -> PostPublic:
+    # Rows come from our own schema, so skip validation
+    return PostPublic.model_construct(
+        id=row.id,
+        title=row.title,
+        content=row.content,
+        published=row.published,
+        author_id=row.author_id,
+        author=UserShared.model_construct(
+            id=row.author_id,
+            username=row.username,
+            email=row.email,
+            created_at=row.author_created_at,
+        ),
+        version=row.version,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+def post_filters(author_id: int | None = None, search: str | None = None) -> list:
+    filters = []
+    if author_id is not None:
+        filters.append(posts.c.author_id == author_id)
+    if search:
+        filters.append(posts.c.title.ilike(f"%{search}%"))
+    return filters
+
+
+def list_posts(
+    session: Session,
+    limit: int,
+    skip: int,
+    author_id: int | None = None,
+    search: str | None = None,
+) -> list[PostPublic]:
+    query = select_post_public().where(*post_filters(author_id, search)).offset(skip).limit(limit)
+    return [row_to_post_public(row) for row in session.connection().execute(query)]
+
+
+def get_post(session: Session, id: int) -> PostPublic | None:
+    query = select_post_public().where(posts.c.id == id)
+    row = session.connection().execute(query).first()
+    return row_to_post_public(row) if row else None
+
+
+def get_latest_post(session: Session) -> PostPublic | None:
+    query = select_post_public().order_by(posts.c.created_at.desc()).limit(1)
+    row = session.connection().execute(query).first()
+    return row_to_post_public(row) if row else None
+
+
+def list_latest_published_posts(session: Session, limit: int) -> list[PostPublic]:
+    query = (
+        select_post_public()
+        .where(posts.c.published)
+        .order_by(posts.c.created_at.desc())
+        .limit(limit)
+    )
+    return [row_to_post_public(row) for row in session.connection().execute(query)]
+
+
+def list_published_post_lastmods(session: Session) -> dict[int, tuple[int, datetime]]:
+    # id -> (version, updated_at) for every published post
+    query = select(posts.c.id, posts.c.version, posts.c.updated_at).where(posts.c.published)
+    return {
+        row.id: (row.version, row.updated_at)
+        for row in session.connection().execute(query)
+    }
+
+
+def get_users_shared(session: Session, ids: list[int]) -> dict[int, UserShared]:
+    query = select(
+        users.c.id, users.c.username, users.c.email, users.c.created_at
+    ).where(users.c.id.in_(ids))
+    return {
+        row.id: UserShared.model_construct(
+            id=row.id, username=row.username, email=row.email, created_at=row.created_at
+        )
+        for row in session.connection().execute(query)
+    }
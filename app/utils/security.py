@@ -11,8 +11,11 @@ from app.models.user_model import User, TokenData, UserCreate
 from app.database import SessionDep
 from app.models.settings_model import settings
 
-# Initialize the password hasher
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Initialize the password hasher.
+# Hashes with a different cost than bcrypt_rounds are flagged for rehash.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v2/auth/token")
 
 
@@ -119,8 +122,15 @@ def authenticate_user(session: SessionDep, username: str, password: str):
     user = get_user(session, username)
     if not user:
         return False
-    
-    if verify_password(password, user.password):
-        return user
-    
-    return False
+
+    # Verify and, if the stored hash predates the current policy, rehash it
+    verified, new_hash = pwd_context.verify_and_update(password, user.password)
+    if not verified:
+        return False
+
+    if new_hash:
+        user.password = new_hash
+        session.add(user)
+        session.commit()
+
+    return user
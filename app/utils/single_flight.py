@@ -0,0 +1,64 @@
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapse identical concurrent calls into one execution.
+
+    The first caller for a key (the leader) runs the function; callers
+    arriving while it is in flight wait for and share its result or
+    exception. Keys are (group, ...) tuples, and per-group counters record
+    how many calls executed and how many were collapsed into another.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self._executed: Counter = Counter()
+        self._collapsed: Counter = Counter()
+
+    def do(self, key: tuple, fn: Callable[[], T]) -> T:
+        group = key[0]
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._executed[group] += 1
+            else:
+                self._collapsed[group] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            # Unregister first so later callers start a fresh call
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._calls[key]
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                group: {
+                    "executed": self._executed[group],
+                    "collapsed": self._collapsed[group],
+                }
+                for group in self._executed
+            }
+
+
+# Shared by the hot read endpoints
+read_coalescer = SingleFlight()
@@ -0,0 +1,126 @@
+import re
+import threading
+from bisect import bisect_left, insort
+
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models.post_model import Post, PostSuggestion
+
+# A word, as Postgres regular expressions define it for \m (start of word)
+WORD = re.compile(r"\w+")
+
+
+class TitleIndex:
+    """In-memory word index over post titles.
+
+    Used for title suggestions where pg_trgm is not available (SQLite,
+    tests). It applies the same rule as the Postgres query: q must occur
+    in the title starting at the beginning of a word. Each distinct
+    lowercased word maps to the ids of the posts whose titles contain it,
+    and the words are kept in a sorted list, so the candidates for a query
+    are found with a bisect over the words its first word can start, then
+    checked against the whole query. The index is loaded from the database
+    on first use and then kept current by the post write endpoints. Writes
+    carry the post version, so hooks that run out of order after
+    concurrent commits cannot replace a newer title with an older one.
+    """
+
+    def __init__(self):
+        self._words: list[str] = []
+        self._ids: dict[str, set[int]] = {}
+        self._titles: dict[int, str] = {}
+        self._versions: dict[int, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _words_of(title: str) -> set[str]:
+        return set(WORD.findall(title.lower()))
+
+    def _insert(self, id: int, title: str, version: int):
+        self._titles[id] = title
+        self._versions[id] = version
+        for word in self._words_of(title):
+            ids = self._ids.get(word)
+            if ids is None:
+                ids = self._ids[word] = set()
+                insort(self._words, word)
+            ids.add(id)
+
+    def _remove(self, id: int):
+        title = self._titles.pop(id, None)
+        self._versions.pop(id, None)
+        if title is None:
+            return
+        for word in self._words_of(title):
+            ids = self._ids[word]
+            ids.discard(id)
+            if not ids:
+                del self._ids[word]
+                del self._words[bisect_left(self._words, word)]
+
+    def _load(self):
+        with Session(engine) as session:
+            rows = session.exec(select(Post.id, Post.title, Post.version)).all()
+        self._titles = {id: title for id, title, _ in rows}
+        self._versions = {id: version for id, _, version in rows}
+        self._ids = {}
+        for id, title, _ in rows:
+            for word in self._words_of(title):
+                self._ids.setdefault(word, set()).add(id)
+        self._words = sorted(self._ids)
+        self._loaded = True
+
+    # Writes are ignored until the index is loaded; the load reads current rows
+    def add(self, id: int, title: str, version: int):
+        with self._lock:
+            if self._loaded and version >= self._versions.get(id, 0):
+                self._remove(id)
+                self._insert(id, title, version)
+
+    def remove(self, id: int):
+        with self._lock:
+            if self._loaded:
+                self._remove(id)
+
+    def clear(self):
+        # Forget everything; the next suggestion reloads from the database
+        with self._lock:
+            self._words, self._ids, self._titles, self._versions = [], {}, {}, {}
+            self._loaded = False
+
+    def suggest(self, q: str, limit: int) -> list[PostSuggestion]:
+        text = q.lower()
+        first = WORD.match(text)
+        if first is None:
+            # Does not start with a word character, so it cannot start a word
+            return []
+        word = first.group()
+        # A query that goes on past its first word needs that whole word
+        whole_word = first.end() < len(text)
+        pattern = re.compile(r"(?<!\w)" + re.escape(q), re.IGNORECASE)
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            results = []
+            seen = set()
+            i = bisect_left(self._words, word)
+            while i < len(self._words) and len(results) < limit:
+                candidate = self._words[i]
+                if not candidate.startswith(word) or (whole_word and candidate != word):
+                    break
+                for id in self._ids[candidate]:
+                    if id in seen:
+                        continue
+                    seen.add(id)
+                    if pattern.search(self._titles[id]):
+                        results.append(PostSuggestion(id=id, title=self._titles[id]))
+                        if len(results) == limit:
+                            break
+                i += 1
+            return results
+
+
+title_index = TitleIndex()
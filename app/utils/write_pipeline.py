@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models.post_model import Post, PostPublic
+from app.models.user_model import User
+from app.models.settings_model import settings
+from app.utils.post_counts import adjust_post_counts
+
+
+class PostWritePipeline:
+    """Group-commit pipeline for post inserts.
+
+    Posts submitted within a short window (or until max_rows is reached)
+    are inserted and committed in one transaction by a background thread.
+    Each caller gets a future resolving to its own PostPublic. If the batch
+    fails, rows are retried one by one so only the offending request fails.
+    """
+
+    def __init__(self, window_ms: float = 2.0, max_rows: int = 100):
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self._queue: queue.Queue[tuple[dict, Future] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="post-write-pipeline", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return
+            # Sentinel: flush whatever is queued, then exit
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, post: Post) -> Future:
+        self.start()
+        # Queue plain values so a failed batch leaves nothing behind to retry
+        future = Future()
+        self._queue.put((post.model_dump(exclude={"id"}), future))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stopping = False
+            while len(batch) < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+            if stopping:
+                return
+
+    def _commit_batch(self, batch: list[tuple[dict, Future]]):
+        # Drop requests that were cancelled while queued
+        batch = [(values, future) for values, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self._insert([values for values, _ in batch])
+        except Exception:
+            # Isolate the failure: retry each row in its own transaction
+            for values, future in batch:
+                try:
+                    [result] = self._insert([values])
+                except Exception as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _insert(self, rows: list[dict]) -> list[PostPublic]:
+        with Session(engine) as session:
+            posts = [Post.model_validate(values) for values in rows]
+            session.add_all(posts)
+            session.flush()
+            adjust_post_counts(session, Counter(post.author_id for post in posts))
+
+            # Load all authors in one query so serialization hits the identity map
+            author_ids = {post.author_id for post in posts}
+            session.exec(select(User).where(User.id.in_(author_ids))).all()
+            results = [PostPublic.model_validate(post) for post in posts]
+
+            session.commit()
+            return results
+
+
+post_write_pipeline = PostWritePipeline(
+    window_ms=settings.post_write_pipeline_window_ms,
+    max_rows=settings.post_write_pipeline_max_rows,
+)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import random
+import time
+from datetime import datetime, timezone
+
+# Add the project root to the Python path
+project_root = os.getcwd()
+if project_root not in sys.path:
+    print(f"Adding {project_root} to Python path")
+    sys.path.insert(0, project_root)
+
+from app.models.post_model import PostPublic, UserShared
+from app.utils.compression import Compressor, CompressedVariantCache, zstandard
+
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which "
+    "but have an they you were her she there been one all we their has would when if so no what "
+    "blog post server request database latency cache query index user content title published "
+    "performance python framework model response endpoint compression payload mobile client"
+).split()
+
+
+def paragraph(rng, sentences):
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def make_posts(rng, n, paragraphs):
+    """Posts shaped like the seeded data: a sentence title and 1-5 paragraphs"""
+    author = UserShared(id=1, username="writer", email="writer@example.com", created_at=datetime.now(timezone.utc))
+    return [
+        PostPublic(
+            id=i,
+            title=paragraph(rng, 1)[:80],
+            content="\n\n".join(paragraph(rng, rng.randint(3, 8)) for _ in range(paragraphs)),
+            published=True,
+            author_id=1,
+            author=author,
+            version=1,
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def time_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(repeat):
+    rng = random.Random(42)
+    payloads = {
+        "single post, 1 paragraph": make_posts(rng, 1, 1)[0].model_dump_json().encode(),
+        "single post, 5 paragraphs": make_posts(rng, 1, 5)[0].model_dump_json().encode(),
+        "list of 10 posts": b"[" + b",".join(p.model_dump_json().encode() for p in make_posts(rng, 10, 3)) + b"]",
+        "list of 100 posts": b"[" + b",".join(p.model_dump_json().encode() for p in make_posts(rng, 100, 3)) + b"]",
+    }
+
+    encodings = [("gzip", 6), ("gzip", 9)]
+    if zstandard:
+        encodings += [("zstd", 3), ("zstd", 9)]
+    else:
+        print("zstandard is not installed, skipping zstd")
+
+    print(f"{'payload':<28} {'encoding':<8} {'raw B':>9} {'out B':>9} {'ratio':>6} {'compress us':>12} {'cache hit us':>13}")
+    for name, body in payloads.items():
+        for encoding, level in encodings:
+            compressor = Compressor(encoding, gzip_level=level, zstd_level=level)
+            compressed = compressor.compress(body)
+            cost = time_per_call(lambda: compressor.compress(body), repeat)
+            cache = CompressedVariantCache(16, max_bytes=len(body) * 2, max_body_size=len(body))
+            cache.get_or_compress(body, compressor)
+            hit = time_per_call(lambda: cache.get_or_compress(body, compressor), repeat)
+            print(
+                f"{name:<28} {encoding + '-' + str(level):<8} {len(body):>9} {len(compressed):>9}"
+                f" {len(body) / len(compressed):>6.1f} {cost:>12.1f} {hit:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark CPU cost versus bytes saved when compressing post payloads")
+    parser.add_argument("--repeat", type=int, default=200, help="Iterations per measurement")
+
+    args = parser.parse_args()
+
+    main(args.repeat)
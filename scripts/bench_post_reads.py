@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the project root to the Python path
+project_root = os.getcwd()
+if project_root not in sys.path:
+    print(f"Adding {project_root} to Python path")
+    sys.path.insert(0, project_root)
+
+from sqlmodel import Session, select, func
+from app.database import engine
+from app.models.post_model import Post, PostPublic
+from app.utils import read_queries
+
+
+def row_bytes(session, query):
+    """Bytes of column data the database returns for a query"""
+    total = 0
+    for row in session.connection().execute(query):
+        for value in row:
+            if isinstance(value, str):
+                total += len(value.encode())
+            elif isinstance(value, bytes):
+                total += len(value)
+            elif value is not None:
+                total += 8
+    return total
+
+
+def measure(label, query, serialize, repeat):
+    """Row-fetch bytes, peak Python memory and throughput for one request shape"""
+    with Session(engine) as session:
+        fetched = row_bytes(session, query)
+        # Warm up statement caches so they do not count towards peak memory
+        serialize(session)
+
+    tracemalloc.start()
+    with Session(engine) as session:
+        serialize(session)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with Session(engine) as session:
+            serialize(session)
+    per_request = (time.perf_counter() - start) / repeat
+
+    print(f"{label:<44} {fetched / 1024:>10.1f} KiB {peak / 1024:>10.1f} KiB {1 / per_request:>8.0f} req/s")
+
+
+def main(page_size, repeat):
+    with Session(engine) as session:
+        total = session.exec(select(func.count()).select_from(Post)).one()
+    if not total:
+        print("No posts found, run scripts/seed_db.py first")
+        return
+    print(f"{total} posts in the database, page size {page_size}\n")
+    print(f"{'request':<44} {'row bytes':>14} {'peak memory':>14} {'throughput':>12}")
+
+    # List page: ORM entities with lazy-loaded authors versus the read query layer
+    list_query = select(Post).limit(page_size)
+    measure(
+        "get_posts, ORM entities",
+        list_query,
+        lambda session: [PostPublic.model_validate(p) for p in session.exec(list_query).all()],
+        repeat,
+    )
+    measure(
+        "get_posts, read query (no identity map)",
+        read_queries.select_post_public().limit(page_size),
+        lambda session: read_queries.list_posts(session, limit=page_size, skip=0),
+        repeat,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure row-fetch bytes, memory and throughput of post read paths")
+    parser.add_argument("--page-size", type=int, default=100, help="Posts per list page")
+    parser.add_argument("--repeat", type=int, default=50, help="Requests timed per measurement")
+
+    args = parser.parse_args()
+
+    main(args.page_size, args.repeat)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the Python path
+project_root = os.getcwd()
+if project_root not in sys.path:
+    print(f"Adding {project_root} to Python path")
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, select
+from app.database import engine
+from app.models.user_model import User
+from app.models.post_model import Post, PostCreate, PostPublic
+from app.utils.write_pipeline import PostWritePipeline
+from app.utils.post_counts import adjust_post_counts
+
+
+commits = 0
+
+
+def count_commit(conn):
+    global commits
+    commits += 1
+
+
+def get_author_id():
+    """Use the first user as author, creating one if the table is empty"""
+    with Session(engine) as session:
+        user = session.exec(select(User).limit(1)).first()
+        if not user:
+            user = User(username="bench", email="bench@example.com", password="x")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+        return user.id
+
+
+def make_post(author_id, i):
+    post = Post.model_validate(PostCreate(title=f"Bench post {i}", content="x" * 2000))
+    post.author_id = author_id
+    return post
+
+
+def per_request_commit(author_id, i):
+    """Same work as create_post without the pipeline: one transaction per post"""
+    with Session(engine) as session:
+        post = make_post(author_id, i)
+        session.add(post)
+        session.flush()
+        adjust_post_counts(session, {author_id: 1})
+        result = PostPublic.model_validate(post)
+        session.commit()
+        return result
+
+
+def run(label, fn, n, concurrency):
+    global commits
+    commits = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fn, range(n)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<20} {n / elapsed:>10.0f} posts/s {commits / elapsed:>10.0f} commits/s"
+        f" {n / max(commits, 1):>8.1f} posts/commit"
+    )
+
+
+def main(n, concurrency, window_ms, max_rows):
+    SQLModel.metadata.create_all(engine)
+    event.listen(engine, "commit", count_commit)
+    author_id = get_author_id()
+
+    print(f"{n} posts, {concurrency} concurrent writers")
+    run("per-request commit", lambda i: per_request_commit(author_id, i), n, concurrency)
+
+    pipeline = PostWritePipeline(window_ms=window_ms, max_rows=max_rows)
+    pipeline.start()
+    run("group commit", lambda i: pipeline.submit(make_post(author_id, i)).result(), n, concurrency)
+    pipeline.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark per-request commits against the post write pipeline")
+    parser.add_argument("--posts", type=int, default=2000, help="Number of posts to insert per run")
+    parser.add_argument("--concurrency", type=int, default=40, help="Concurrent writers (FastAPI's default threadpool size)")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="Pipeline batching window")
+    parser.add_argument("--max-rows", type=int, default=100, help="Pipeline batch size limit")
+
+    args = parser.parse_args()
+
+    main(args.posts, args.concurrency, args.window_ms, args.max_rows)
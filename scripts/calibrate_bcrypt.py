@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+
+def time_rounds(rounds, samples):
+    """Median time in milliseconds to verify a password at a given cost, i.e. one login"""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms, min_rounds, max_rounds, samples):
+    """Highest cost factor whose login time stays within the latency budget"""
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed = time_rounds(rounds, samples)
+        within = elapsed <= target_ms
+        print(f"rounds={rounds:>2}  {elapsed:>8.1f} ms  {'ok' if within else 'over budget'}")
+        if not within:
+            if rounds == min_rounds:
+                print(f"Warning: even the minimum cost of {min_rounds} exceeds the budget")
+            break
+        chosen = rounds
+    return chosen
+
+
+def write_env(path, rounds):
+    """Set BCRYPT_ROUNDS in an env file, appending it if missing"""
+    line = f"BCRYPT_ROUNDS={rounds}"
+    content = ""
+    if os.path.exists(path):
+        with open(path) as f:
+            content = f.read()
+    if re.search(r"^BCRYPT_ROUNDS=.*$", content, flags=re.MULTILINE):
+        content = re.sub(r"^BCRYPT_ROUNDS=.*$", line, content, flags=re.MULTILINE)
+    else:
+        if content and not content.endswith("\n"):
+            content += "\n"
+        content += line + "\n"
+    with open(path, "w") as f:
+        f.write(content)
+    print(f"Wrote {line} to {path}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pick the bcrypt cost factor that fits a login latency budget on this host")
+    parser.add_argument("--target-ms", type=float, default=250, help="Latency budget for one password check at login")
+    parser.add_argument("--min-rounds", type=int, default=10, help="Lowest cost factor to accept")
+    parser.add_argument("--max-rounds", type=int, default=16, help="Highest cost factor to try")
+    parser.add_argument("--samples", type=int, default=5, help="Logins timed per cost factor")
+    parser.add_argument("--env-file", help="Write the chosen BCRYPT_ROUNDS to this env file (e.g. .env)")
+
+    args = parser.parse_args()
+
+    rounds = calibrate(args.target_ms, args.min_rounds, args.max_rounds, args.samples)
+    print(f"Chosen cost factor: BCRYPT_ROUNDS={rounds}")
+    if args.env_file:
+        write_env(args.env_file, rounds)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+
+# Settings are read from the environment when app is first imported,
+# so point the app at a throwaway SQLite database before that happens
+os.environ.update(
+    {
+        "TITLE": "FastAPI Blog",
+        "VERSION": "test",
+        "SUMMARY": "test",
+        "DESCRIPTION": "test",
+        "CONTACT": "test",
+        "LICENSE_INFO": "{}",
+        "ENV": "test",
+        "SECRET_KEY": "test-secret-key-of-at-least-32-bytes",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+        "POSTGRES_URL": f"sqlite:///{tempfile.mkdtemp()}/test.sqlite",
+        "ALLOWED_ORIGINS": "*",
+        "BCRYPT_ROUNDS": "4",
+    }
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+from app.database import engine
+from app.main import app
+from app.utils.feeds import feed_cache
+from app.utils.title_index import title_index
+
+
+@pytest.fixture
+def client():
+    # Fresh tables for every test; the lifespan recreates them
+    SQLModel.metadata.drop_all(engine)
+    title_index.clear()
+    feed_cache.clear()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Create a user and return Authorization headers for it"""
+
+    def make_user(username: str) -> dict[str, str]:
+        password = "secret123"
+        client.post(
+            "/v2/users/",
+            json={"username": username, "email": f"{username}@example.com", "password": password},
+        )
+        response = client.post("/v2/auth/token", data={"username": username, "password": password})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return make_user
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database, recorded until the test ends"""
+    recorded: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def verbs(statements: list[str]) -> list[str]:
+    """First keyword of each recorded statement, e.g. ["SELECT", "UPDATE"]"""
+    return [statement.split(None, 1)[0].upper() for statement in statements]
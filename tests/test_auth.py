@@ -0,0 +1,65 @@
+import pytest
+from passlib.context import CryptContext
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models.user_model import User
+from app.utils import security
+from conftest import verbs
+
+PASSWORD = "secret123"
+
+
+def stored_hash(username: str) -> str:
+    with Session(engine) as session:
+        return session.exec(select(User.password).where(User.username == username)).one()
+
+
+def login(client, password: str = PASSWORD):
+    return client.post("/v2/auth/token", data={"username": "alice", "password": password})
+
+
+@pytest.fixture
+def raised_cost(client, make_user, monkeypatch):
+    """alice's hash was made at cost 4; the policy is now cost 5"""
+    make_user("alice")
+    assert stored_hash("alice").startswith("$2b$04$")
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+    monkeypatch.setattr(security, "pwd_context", context)
+
+
+def test_login_replaces_a_hash_below_the_current_cost(client, raised_cost, statements):
+    response = login(client)
+    sent = verbs(statements)
+
+    assert response.status_code == 200
+    assert sent[:2] == ["SELECT", "UPDATE"] and sent.count("UPDATE") == 1
+    assert stored_hash("alice").startswith("$2b$05$")
+
+    # The new hash still verifies
+    assert login(client).status_code == 200
+
+
+def test_login_at_the_current_cost_writes_nothing(client, make_user, statements):
+    make_user("alice")
+    before = stored_hash("alice")
+    statements.clear()
+
+    response = login(client)
+    sent = verbs(statements)
+
+    assert response.status_code == 200
+    assert sent == ["SELECT"]
+    assert stored_hash("alice") == before
+
+
+def test_failed_login_does_not_rehash(client, raised_cost, statements):
+    before = stored_hash("alice")
+    statements.clear()
+
+    response = login(client, password="wrong-password")
+    sent = verbs(statements)
+
+    assert response.status_code == 401
+    assert sent == ["SELECT"]
+    assert stored_hash("alice") == before
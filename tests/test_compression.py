@@ -0,0 +1,51 @@
+import gzip
+import os
+
+from app.utils.compression import CompressedVariantCache, Compressor, negotiate_encoding
+
+
+def gzip_compressor() -> Compressor:
+    return Compressor("gzip", gzip_level=6, zstd_level=3)
+
+
+def test_negotiation_honours_q_values():
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("br") is None
+
+
+def test_cache_is_bounded_by_total_compressed_bytes():
+    # Random bytes do not compress, so every entry costs about 4 KiB
+    bodies = [os.urandom(4096) for _ in range(10)]
+    cache = CompressedVariantCache(max_entries=100, max_bytes=16 * 1024, max_body_size=8192)
+
+    for body in bodies:
+        cache.get_or_compress(body, gzip_compressor())
+
+    assert cache.size <= 16 * 1024
+    assert len(cache) == 3
+    # The most recent bodies are the ones kept: a hit returns the cached bytes
+    cached = cache.get_or_compress(bodies[-1], gzip_compressor())
+    assert cache.get_or_compress(bodies[-1], gzip_compressor()) is cached
+
+
+def test_bodies_above_the_size_limit_are_not_cached():
+    cache = CompressedVariantCache(max_entries=100, max_bytes=1024 * 1024, max_body_size=1024)
+
+    compressed = cache.get_or_compress(b"x" * 2048, gzip_compressor())
+
+    assert gzip.decompress(compressed) == b"x" * 2048
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_large_list_page_is_gzipped(client, make_user):
+    alice = make_user("alice")
+    for i in range(20):
+        client.post("/v2/posts/", json={"title": f"Post {i}", "content": "lorem ipsum " * 20}, headers=alice)
+
+    response = client.get("/v2/posts/?limit=20", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(response.json()) == 20
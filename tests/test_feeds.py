@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+from sqlmodel import Session
+
+from app.database import engine
+from app.models.post_model import Post, PostPublic
+from app.utils import read_queries
+from app.utils.feeds import FeedCache, feed_cache
+
+
+def test_feed_serves_conditional_gets(client, make_user):
+    alice = make_user("alice")
+    client.post("/v2/posts/", json={"title": "Hello", "content": "World"}, headers=alice)
+
+    response = client.get("/v2/feed.atom")
+    assert response.status_code == 200
+    assert b"<title>Hello</title>" in response.content
+
+    again = client.get("/v2/feed.atom", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_out_of_order_write_hooks_keep_the_newest_version(client, make_user):
+    alice = make_user("alice")
+    created = client.post("/v2/posts/", json={"title": "Old title", "content": "x"}, headers=alice).json()
+    client.get("/v2/feed.atom")
+    sitemap = client.get("/v2/sitemaps/0.xml")
+
+    client.put(f"/v2/posts/{created['id']}", json={"title": "New title"}, headers=alice)
+    # The hook for version 1 arrives after the hook for version 2
+    feed_cache.post_saved(PostPublic.model_validate(created))
+
+    feed = client.get("/v2/feed.atom").content
+    assert b"New title" in feed
+    assert b"Old title" not in feed
+    assert client.get("/v2/sitemaps/0.xml").content != sitemap.content
+
+
+def add_post_directly(author_id: int, title: str):
+    with Session(engine) as session:
+        session.add(Post(title=title, content="x", author_id=author_id))
+        session.commit()
+
+
+def test_writes_from_outside_the_app_show_up_after_the_ttl(client, make_user):
+    make_user("alice")
+    cached = FeedCache(feed_size=10, shard_size=100, ttl=3600)
+    reloading = FeedCache(feed_size=10, shard_size=100, ttl=0)
+    for cache in (cached, reloading):
+        cache.feed()
+        cache.sitemap_index()
+
+    add_post_directly(1, "Written by a script")
+
+    assert b"Written by a script" not in cached.feed().body
+    assert b"Written by a script" in reloading.feed().body
+    assert reloading.sitemap_shard(0) is not None
+    assert cached.sitemap_shard(0) is None
+
+
+@pytest.mark.parametrize(
+    "query, load",
+    [
+        ("list_latest_published_posts", lambda cache: cache.feed().body),
+        ("list_published_post_lastmods", lambda cache: cache.sitemap_shard(0).body),
+    ],
+)
+def test_write_hooks_do_not_wait_for_a_reload(client, make_user, monkeypatch, query, load):
+    alice = make_user("alice")
+    client.post("/v2/posts/", json={"title": "First", "content": "x"}, headers=alice)
+    cache = FeedCache(feed_size=10, shard_size=100, ttl=3600)
+
+    # The reload reads the database, then stalls before swapping in its rows
+    started, release = threading.Event(), threading.Event()
+    original = getattr(read_queries, query)
+
+    def stalled(*args):
+        rows = original(*args)
+        started.set()
+        release.wait(5)
+        return rows
+
+    monkeypatch.setattr(read_queries, query, stalled)
+    results = []
+    loader = threading.Thread(target=lambda: results.append(load(cache)))
+    loader.start()
+    assert started.wait(5)
+
+    # A post committed after the reload read the database
+    created = client.post("/v2/posts/", json={"title": "Second", "content": "x"}, headers=alice).json()
+    hook = threading.Thread(target=cache.post_saved, args=(PostPublic.model_validate(created),))
+    hook.start()
+    hook.join(1)
+    assert not hook.is_alive()
+
+    release.set()
+    loader.join(5)
+    # The hook's change is replayed over the rows the reload read
+    assert f"/v2/posts/{created['id']}".encode() in results[0]
+    assert f"/v2/posts/{created['id']}".encode() in load(cache)
@@ -0,0 +1,85 @@
+from sqlmodel import Session, delete, func, select
+
+from app.database import engine
+from app.models.post_model import Post, PostCount
+from app.utils import post_counts
+from app.utils.write_pipeline import PostWritePipeline
+
+
+def total_header(client, **params) -> tuple[int, str]:
+    response = client.get("/v2/posts/", params=params)
+    return int(response.headers["X-Total-Count"]), response.headers["X-Total-Count-Kind"]
+
+
+def actual_count(**filters) -> int:
+    with Session(engine) as session:
+        query = select(func.count()).select_from(Post).filter_by(**filters)
+        return session.exec(query).one()
+
+
+def create_posts(client, headers, titles):
+    return [
+        client.post("/v2/posts/", json={"title": title, "content": "x"}, headers=headers).json()
+        for title in titles
+    ]
+
+
+def test_counts_stay_exact_through_every_write_path(client, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    alice_posts = create_posts(client, alice, [f"Alice {i}" for i in range(5)])
+    create_posts(client, bob, [f"Bob {i}" for i in range(3)])
+    client.delete(f"/v2/posts/{alice_posts[0]['id']}", headers=alice)
+    # Someone else's post: the failed delete must not move the counters
+    client.delete(f"/v2/posts/{alice_posts[1]['id']}", headers=bob)
+
+    pipeline = PostWritePipeline(window_ms=5, max_rows=10)
+    try:
+        for i in range(4):
+            pipeline.submit(Post(title=f"Piped {i}", content="x", author_id=2)).result(timeout=5)
+    finally:
+        pipeline.stop()
+
+    assert total_header(client) == (actual_count(), "exact") == (11, "exact")
+    assert total_header(client, author_id=1) == (actual_count(author_id=1), "exact") == (4, "exact")
+    assert total_header(client, author_id=2) == (actual_count(author_id=2), "exact") == (7, "exact")
+
+    client.delete("/v2/users/me", headers=bob)
+
+    assert total_header(client) == (4, "exact")
+    assert total_header(client, author_id=2) == (0, "exact")
+
+
+def test_small_filtered_counts_are_exact(client, make_user):
+    alice = make_user("alice")
+    create_posts(client, alice, ["Cats", "More cats", "Dogs"])
+
+    assert total_header(client, search="cat") == (2, "exact")
+    assert total_header(client, search="cat", author_id=1) == (2, "exact")
+    assert total_header(client, search="cat", author_id=9) == (0, "exact")
+
+
+def test_writes_spread_over_counter_slots(client, make_user):
+    alice = make_user("alice")
+    create_posts(client, alice, [f"Post {i}" for i in range(30)])
+
+    with Session(engine) as session:
+        slots = session.exec(select(PostCount.slot).where(PostCount.scope == "all")).all()
+
+    assert len(slots) > 1
+    assert total_header(client) == (30, "exact")
+
+
+def test_seed_counts_existing_posts_and_tolerates_a_concurrent_seed(client, make_user, monkeypatch):
+    alice = make_user("alice")
+    create_posts(client, alice, ["One", "Two"])
+    with Session(engine) as session:
+        session.exec(delete(PostCount))
+        session.commit()
+
+        post_counts.seed_post_counts(session)
+        # A second worker that checked before the first one inserted
+        monkeypatch.setattr(post_counts, "counters_initialized", lambda session: False)
+        post_counts.seed_post_counts(session)
+
+        assert post_counts.count_posts(session) == (2, True)
+        assert post_counts.count_posts(session, author_id=1) == (2, True)
@@ -0,0 +1,156 @@
+import pytest
+
+from conftest import verbs
+
+
+@pytest.fixture
+def alice(make_user):
+    return make_user("alice")
+
+
+@pytest.fixture
+def post(client, alice):
+    response = client.post("/v2/posts/", json={"title": "Hello", "content": "World"}, headers=alice)
+    assert response.status_code == 201
+    return response.json()
+
+
+# Round trips per write. Every authenticated request starts with the
+# user lookup (SELECT) done by get_current_user.
+
+
+def test_create_post_round_trips(client, alice, statements):
+    response = client.post("/v2/posts/", json={"title": "Hello", "content": "World"}, headers=alice)
+
+    assert response.status_code == 201
+    # INSERT ... RETURNING, then the post counter upsert
+    assert verbs(statements) == ["SELECT", "INSERT", "INSERT"]
+
+
+def test_update_post_round_trips(client, alice, post, statements):
+    response = client.put(f"/v2/posts/{post['id']}", json={"title": "Edited"}, headers=alice)
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Edited"
+    # A single UPDATE ... RETURNING, no read before the write
+    assert verbs(statements) == ["SELECT", "UPDATE"]
+
+
+def test_delete_post_round_trips(client, alice, post, statements):
+    response = client.delete(f"/v2/posts/{post['id']}", headers=alice)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == post["id"]
+    # DELETE ... RETURNING, then the post counter upsert
+    assert verbs(statements) == ["SELECT", "DELETE", "INSERT"]
+
+
+def test_update_my_profile_round_trips(client, alice, post, statements):
+    response = client.put("/v2/users/me", json={"username": "alice2"}, headers=alice)
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "alice2"
+    # UPDATE ... RETURNING, then the posts embedded in the profile
+    assert verbs(statements) == ["SELECT", "UPDATE", "SELECT"]
+
+
+@pytest.mark.parametrize("method, verb", [("put", "UPDATE"), ("delete", "DELETE")])
+def test_write_missing_post_is_404(client, alice, statements, method, verb):
+    response = client.request(method, "/v2/posts/999", json={"title": "Edited"}, headers=alice)
+
+    assert response.status_code == 404
+    # The conditional write matched nothing; one lookup tells why
+    assert verbs(statements)[1:] == [verb, "SELECT"]
+
+
+@pytest.mark.parametrize("method, verb", [("put", "UPDATE"), ("delete", "DELETE")])
+def test_write_someone_elses_post_is_403(client, make_user, post, statements, method, verb):
+    bob = make_user("bob")
+    statements.clear()
+
+    response = client.request(method, f"/v2/posts/{post['id']}", json={"title": "Edited"}, headers=bob)
+
+    assert response.status_code == 403
+    assert verbs(statements)[1:] == [verb, "SELECT"]
+    assert client.get(f"/v2/posts/{post['id']}").json()["title"] == "Hello"
+
+
+# Optimistic concurrency with If-Match
+
+
+def test_get_post_returns_version_etag(client, post):
+    response = client.get(f"/v2/posts/{post['id']}")
+
+    assert response.headers["ETag"] == '"1"'
+    assert response.json()["version"] == 1
+
+
+def test_update_with_current_version_bumps_it(client, alice, post, statements):
+    response = client.put(
+        f"/v2/posts/{post['id']}", json={"title": "Edited"}, headers={**alice, "If-Match": '"1"'}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert response.json()["version"] == 2
+    # The version check is folded into the same UPDATE
+    assert verbs(statements) == ["SELECT", "UPDATE"]
+
+
+def test_update_with_stale_version_is_412(client, alice, post):
+    client.put(f"/v2/posts/{post['id']}", json={"title": "First"}, headers={**alice, "If-Match": '"1"'})
+
+    response = client.put(
+        f"/v2/posts/{post['id']}", json={"title": "Second"}, headers={**alice, "If-Match": '"1"'}
+    )
+
+    assert response.status_code == 412
+    current = client.get(f"/v2/posts/{post['id']}").json()
+    assert (current["title"], current["version"]) == ("First", 2)
+
+
+def test_update_with_any_listed_version_applies(client, alice, post):
+    response = client.put(
+        f"/v2/posts/{post['id']}", json={"title": "Edited"}, headers={**alice, "If-Match": '"3", "1"'}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+
+@pytest.mark.parametrize("if_match", ['W/"1"', "1", '"one"', '""', '"99999999999999999999"'])
+def test_update_with_unusable_if_match_is_412(client, alice, post, statements, if_match):
+    response = client.put(
+        f"/v2/posts/{post['id']}", json={"title": "Edited"}, headers={**alice, "If-Match": if_match}
+    )
+
+    assert response.status_code == 412
+    # Treated as matching no version: the UPDATE misses and the lookup explains why
+    assert verbs(statements) == ["SELECT", "UPDATE", "SELECT"]
+    assert client.get(f"/v2/posts/{post['id']}").json()["version"] == 1
+
+
+def test_unusable_if_match_on_a_missing_post_is_404(client, alice):
+    response = client.put("/v2/posts/999", json={"title": "Edited"}, headers={**alice, "If-Match": 'W/"1"'})
+
+    assert response.status_code == 404
+
+
+def test_update_with_wildcard_if_match_always_applies(client, alice, post):
+    response = client.put(
+        f"/v2/posts/{post['id']}", json={"title": "Edited"}, headers={**alice, "If-Match": "*"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+
+@pytest.mark.parametrize("if_match", ['"7"', 'W/"1"', "garbage"])
+def test_if_match_on_someone_elses_post_is_403(client, make_user, post, if_match):
+    bob = make_user("bob")
+
+    response = client.put(
+        f"/v2/posts/{post['id']}", json={"title": "Edited"}, headers={**bob, "If-Match": if_match}
+    )
+
+    assert response.status_code == 403
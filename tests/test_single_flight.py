@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+class Boom(Exception):
+    pass
+
+
+def wait_for_followers(flight: SingleFlight, group: str, count: int):
+    # Followers are counted as collapsed before they block on the leader
+    while flight.stats().get(group, {}).get("collapsed", 0) < count:
+        threading.Event().wait(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, ("post", 1), load)
+        while not calls:
+            threading.Event().wait(0.001)
+        followers = [pool.submit(flight.do, ("post", 1), load) for _ in range(3)]
+        wait_for_followers(flight, "post", 3)
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {"post": {"executed": 1, "collapsed": 3}}
+
+
+def test_leader_exception_reaches_every_waiting_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise Boom("database went away")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, ("user", 7), fail)
+        started.wait(5)
+        followers = [pool.submit(flight.do, ("user", 7), fail) for _ in range(3)]
+        wait_for_followers(flight, "user", 3)
+        release.set()
+        errors = [leader.exception(5)] + [f.exception(5) for f in followers]
+
+    assert all(isinstance(error, Boom) for error in errors)
+    # Everyone sees the leader's exception, not one of their own
+    assert len({id(error) for error in errors}) == 1
+
+
+def test_failed_call_is_not_cached():
+    flight = SingleFlight()
+
+    def fail():
+        raise Boom()
+
+    with pytest.raises(Boom):
+        flight.do(("post", 1), fail)
+
+    assert flight.do(("post", 1), lambda: "fresh") == "fresh"
+    assert flight.stats() == {"post": {"executed": 2, "collapsed": 0}}
+
+
+def test_missing_post_404_is_not_cached(client, make_user):
+    assert client.get("/v2/posts/1").status_code == 404
+
+    alice = make_user("alice")
+    client.post("/v2/posts/", json={"title": "Hello", "content": "World"}, headers=alice)
+
+    assert client.get("/v2/posts/1").status_code == 200
@@ -0,0 +1,82 @@
+import pytest
+
+from app.utils.title_index import TitleIndex
+
+
+def titles(client, q):
+    response = client.get("/v2/posts/suggest", params={"q": q})
+    assert response.status_code == 200
+    return [suggestion["title"] for suggestion in response.json()]
+
+
+def test_suggest_matches_word_prefixes(client, make_user):
+    alice = make_user("alice")
+    for title in ("Fast APIs", "Learning FastAPI", "Slow food"):
+        client.post("/v2/posts/", json={"title": title, "content": "x"}, headers=alice)
+
+    assert sorted(titles(client, "fast")) == ["Fast APIs", "Learning FastAPI"]
+    assert titles(client, "food") == ["Slow food"]
+    assert titles(client, "earning") == []
+
+
+@pytest.mark.parametrize(
+    "q, expected",
+    [
+        ("fa", ["Fast-API tips", "Learning FastAPI"]),
+        ("api", ["Fast-API tips"]),
+        ("earning", []),
+        ("learning fa", ["Learning FastAPI"]),
+        ("learn fa", []),
+        ("API TI", ["Fast-API tips"]),
+        ("-api", []),
+    ],
+)
+def test_suggest_matches_from_the_start_of_a_word(client, make_user, q, expected):
+    alice = make_user("alice")
+    for title in ("Fast-API tips", "Learning FastAPI"):
+        client.post("/v2/posts/", json={"title": title, "content": "x"}, headers=alice)
+
+    assert sorted(titles(client, q)) == expected
+
+
+def test_index_stores_each_word_once(client):
+    index = TitleIndex()
+    index.suggest("x", 10)
+
+    index.add(1, "Tips and more tips", version=1)
+    index.add(2, "More tips", version=1)
+
+    assert index._words == ["and", "more", "tips"]
+    index.remove(1)
+    assert index._words == ["more", "tips"]
+
+
+def test_suggest_follows_post_writes(client, make_user):
+    alice = make_user("alice")
+    post = client.post("/v2/posts/", json={"title": "Draft", "content": "x"}, headers=alice).json()
+    assert titles(client, "draft") == ["Draft"]
+
+    client.put(f"/v2/posts/{post['id']}", json={"title": "Final"}, headers=alice)
+    assert titles(client, "draft") == []
+    assert titles(client, "final") == ["Final"]
+
+    client.delete(f"/v2/posts/{post['id']}", headers=alice)
+    assert titles(client, "final") == []
+
+
+def test_out_of_order_writes_keep_the_newest_title(client):
+    index = TitleIndex()
+    index.suggest("x", 10)  # load the (empty) index
+
+    # Hooks for versions 3 and 2 of one post, run in reverse commit order
+    index.add(1, "Newest title", version=3)
+    index.add(1, "Older title", version=2)
+
+    assert [s.title for s in index.suggest("newest", 10)] == ["Newest title"]
+    assert index.suggest("older", 10) == []
+
+
+def test_suggest_validates_limits(client):
+    assert client.get("/v2/posts/suggest", params={"q": ""}).status_code == 422
+    assert client.get("/v2/posts/suggest", params={"q": "x" * 65}).status_code == 422
+    assert client.get("/v2/posts/suggest", params={"q": "x", "limit": 21}).status_code == 422
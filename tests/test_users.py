@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.models.user_model import UserUpdate
+from conftest import verbs
+
+
+def create_posts(client, headers, count: int):
+    for i in range(count):
+        client.post("/v2/posts/", json={"title": f"Post {i}", "content": f"Body {i}"}, headers=headers)
+
+
+def test_profile_embeds_posts_with_content(client, make_user, statements):
+    alice = make_user("alice")
+    create_posts(client, alice, 3)
+    statements.clear()
+
+    profile = client.get("/v2/users/1").json()
+
+    assert [post["content"] for post in profile["posts"]] == ["Body 0", "Body 1", "Body 2"]
+    # The user, then all posts with their bodies in one query
+    assert verbs(statements) == ["SELECT", "SELECT"]
+
+
+def test_my_profile_embeds_posts_with_content(client, make_user, statements):
+    alice = make_user("alice")
+    create_posts(client, alice, 3)
+    statements.clear()
+
+    profile = client.get("/v2/users/me", headers=alice).json()
+
+    assert [post["content"] for post in profile["posts"]] == ["Body 0", "Body 1", "Body 2"]
+    assert verbs(statements) == ["SELECT", "SELECT"]
+
+
+def test_empty_profile_update_embeds_posts_with_content(client, make_user, statements):
+    alice = make_user("alice")
+    create_posts(client, alice, 3)
+    statements.clear()
+
+    response = client.put("/v2/users/me", json={}, headers=alice)
+
+    assert response.status_code == 200
+    assert [post["content"] for post in response.json()["posts"]] == ["Body 0", "Body 1", "Body 2"]
+    # The user, then all posts in one query, with nothing written
+    assert verbs(statements) == ["SELECT", "SELECT"]
+
+
+def test_delete_my_profile_returns_the_deleted_posts(client, make_user):
+    alice = make_user("alice")
+    create_posts(client, alice, 2)
+
+    response = client.delete("/v2/users/me", headers=alice)
+
+    assert response.status_code == 200
+    assert [post["content"] for post in response.json()["posts"]] == ["Body 0", "Body 1"]
+    assert client.get("/v2/users/1").status_code == 404
+    assert client.get("/v2/posts/").json() == []
+
+
+def test_batch_lookup_keeps_order_and_reports_missing(client, make_user):
+    make_user("alice")
+    make_user("bob")
+
+    batch = client.get("/v2/users/", params={"ids": "2,9,1,2"}).json()
+
+    assert [user["username"] for user in batch["users"]] == ["bob", "alice"]
+    assert batch["missing"] == [9]
+
+
+def test_batch_lookup_rejects_ids_out_of_range(client, make_user):
+    make_user("alice")
+
+    response = client.get("/v2/users/", params={"ids": "1,99999999999999999999999"})
+    assert response.status_code == 400
+
+    largest = client.get("/v2/users/", params={"ids": str(2**31 - 1)})
+    assert largest.json() == {"users": [], "missing": [2**31 - 1]}
+
+
+def test_batch_lookup_limits_ids(client):
+    ids = ",".join(str(id) for id in range(1, 102))
+
+    assert client.get("/v2/users/", params={"ids": ids}).status_code == 400
+    assert client.get("/v2/users/", params={"ids": "1,,2"}).status_code == 422
+
+
+def test_profile_update_reports_the_duplicate_field(client, make_user):
+    make_user("alice")
+    bob = make_user("bob")
+
+    taken_username = client.put("/v2/users/me", json={"username": "alice"}, headers=bob)
+    taken_email = client.put("/v2/users/me", json={"email": "alice@example.com"}, headers=bob)
+
+    assert taken_username.status_code == 400
+    assert taken_username.json()["detail"] == "User with this username already exists"
+    assert taken_email.status_code == 400
+    assert taken_email.json()["detail"] == "User with this email already exists"
+
+
+@pytest.mark.parametrize("field", ["username", "email", "password", "disabled"])
+def test_profile_update_rejects_explicit_nulls(client, make_user, statements, field):
+    alice = make_user("alice")
+    statements.clear()
+
+    response = client.put("/v2/users/me", json={field: None}, headers=alice)
+
+    assert response.status_code == 422
+    assert "UPDATE" not in verbs(statements)
+
+
+def test_profile_update_does_not_blame_a_duplicate_for_other_integrity_errors(client, make_user):
+    alice = make_user("alice")
+
+    # Bypass validation: a NOT NULL violation must not be reported as a clash
+    with pytest.raises(IntegrityError):
+        with patch.object(UserUpdate, "model_dump", return_value={"username": None}):
+            client.put("/v2/users/me", json={"username": "x"}, headers=alice)
@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.database import engine
+from app.models.post_model import Post
+from app.models.settings_model import settings
+from app.models.user_model import User
+from app.routers import post as post_router
+from app.utils.write_pipeline import PostWritePipeline
+
+
+class RecordingPipeline(PostWritePipeline):
+    """Pipeline that records the size of every insert attempt"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.attempts: list[int] = []
+
+    def _insert(self, rows):
+        self.attempts.append(len(rows))
+        return super()._insert(rows)
+
+
+@pytest.fixture
+def author_id(client, make_user):
+    make_user("alice")
+    with Session(engine) as session:
+        return session.exec(select(User.id).where(User.username == "alice")).one()
+
+
+def make_post(author_id: int, title: str | None) -> Post:
+    return Post(title=title, content="body", author_id=author_id)
+
+
+def test_failing_row_fails_only_its_own_future(author_id):
+    pipeline = RecordingPipeline(window_ms=200, max_rows=10)
+    try:
+        futures = [
+            pipeline.submit(make_post(author_id, "First")),
+            pipeline.submit(make_post(author_id, None)),  # violates NOT NULL
+            pipeline.submit(make_post(author_id, "Third")),
+        ]
+        first, broken, third = (future.exception(timeout=5) or future.result() for future in futures)
+    finally:
+        pipeline.stop()
+
+    # One batch attempt, then each row retried in its own transaction
+    assert pipeline.attempts == [3, 1, 1, 1]
+    assert isinstance(broken, Exception)
+    assert (first.title, third.title) == ("First", "Third")
+    with Session(engine) as session:
+        titles = session.exec(select(Post.title).order_by(Post.id)).all()
+        assert titles == ["First", "Third"]
+        assert session.exec(select(func.count()).select_from(Post)).one() == 2
+
+
+class StalledPipeline:
+    def __init__(self):
+        self.futures: list[Future] = []
+
+    def submit(self, post: Post) -> Future:
+        self.futures.append(Future())
+        return self.futures[-1]
+
+
+def test_create_post_gives_up_on_a_stalled_pipeline(client, make_user, monkeypatch):
+    alice = make_user("alice")
+    stalled = StalledPipeline()
+    monkeypatch.setattr(settings, "post_write_pipeline", True)
+    monkeypatch.setattr(settings, "post_write_pipeline_timeout_s", 0.05)
+    monkeypatch.setattr(post_router, "post_write_pipeline", stalled)
+
+    response = client.post("/v2/posts/", json={"title": "Hello", "content": "World"}, headers=alice)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    # The queued post is withdrawn so a later batch does not commit it
+    assert stalled.futures[0].cancelled()
+
+
+class SlowPipeline(PostWritePipeline):
+    """Pipeline whose batches start at once but commit only when released"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+
+    def _insert(self, rows):
+        self.release.wait(5)
+        return super()._insert(rows)
+
+
+def test_post_committed_after_a_timeout_is_still_indexed(client, make_user, monkeypatch):
+    alice = make_user("alice")
+    slow = SlowPipeline(window_ms=0, max_rows=10)
+    monkeypatch.setattr(settings, "post_write_pipeline", True)
+    monkeypatch.setattr(settings, "post_write_pipeline_timeout_s", 0.05)
+    monkeypatch.setattr(post_router, "post_write_pipeline", slow)
+    # Load the title index and feed so only the write hooks can add the post
+    assert client.get("/v2/posts/suggest", params={"q": "late"}).json() == []
+    assert b"Late post" not in client.get("/v2/feed.atom").content
+
+    response = client.post("/v2/posts/", json={"title": "Late post", "content": "x"}, headers=alice)
+    assert response.status_code == 503
+
+    # The batch was already running, so the post still commits
+    slow.release.set()
+    slow.stop()
+    suggestions = client.get("/v2/posts/suggest", params={"q": "late"}).json()
+    assert [s["title"] for s in suggestions] == ["Late post"]
+    assert b"Late post" in client.get("/v2/feed.atom").content
+
+    # A client that retries after the 503 creates a second copy
+    retry = client.post("/v2/posts/", json={"title": "Late post", "content": "x"}, headers=alice)
+    assert retry.status_code == 201
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(Post)).one() == 2